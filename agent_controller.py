@@ -6,12 +6,54 @@ Orchestrates a constellation of GitHub-native AI agents.
 import os
 import json
 import time
+import random
 import requests
 import base64
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta, timezone
+from types import MappingProxyType
+
+try:
+    import httpx  # Optional: HTTP/2 multiplexing over a single connection
+except ImportError:
+    httpx = None
+
+try:
+    import orjson  # Optional: much faster decode for large issue/run lists
+except ImportError:
+    orjson = None
+
+try:
+    import brotli  # Optional: needed before we may advertise br downstream
+except ImportError:
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        brotli = None
+
+# Advertise only encodings this process can actually decode -- urllib3
+# silently skips decoding unknown ones, which would hand raw brotli bytes
+# to the JSON parser. Same way requests computes its own default.
+ACCEPT_ENCODING = "gzip, deflate, br" if brotli is not None else "gzip, deflate"
+
+
+def _json_loads(payload):
+    """Decode JSON with orjson when installed, stdlib json otherwise."""
+    if orjson is not None:
+        return orjson.loads(payload)
+    return json.loads(payload)
+
+# Exception families differ between the two HTTP stacks; catch both where installed.
+if httpx is not None:
+    HTTP_STATUS_ERRORS = (requests.exceptions.HTTPError, httpx.HTTPStatusError)
+    HTTP_REQUEST_ERRORS = (requests.exceptions.RequestException, httpx.HTTPError)
+else:
+    HTTP_STATUS_ERRORS = (requests.exceptions.HTTPError,)
+    HTTP_REQUEST_ERRORS = (requests.exceptions.RequestException,)
 
 # Configuration
 GITHUB_API_URL = "https://api.github.com"
+MAX_ASSIGNMENT_WORKERS = 8  # Bounded concurrency to respect GitHub secondary rate limits
 OWNER = "zipaJopa"  # The owner of the constellation repositories
 AGENT_TASKS_REPO = f"{OWNER}/agent-tasks"
 AGENT_RESULTS_REPO = f"{OWNER}/agent-results"
@@ -20,7 +62,7 @@ AGENT_CONTROLLER_REPO = f"{OWNER}/agent-controller" # For alerts
 # Mapping task types to agent bot usernames (or GitHub App slugs)
 # These usernames will be assigned to issues.
 # Ensure these users/apps have permissions to be assigned and to comment/label.
-AGENT_MAPPING = {
+AGENT_MAPPING = MappingProxyType({
     "harvest": "github-harvester-bot",
     "arbitrage": "github-arbitrage-agent-bot",
     "wrapper": "ai-wrapper-factory-bot",
@@ -41,7 +83,11 @@ AGENT_MAPPING = {
     "copywriter_swarm": "ai-copywriter-swarm-bot",
     "price_scraper": "price-scraper-network-bot",
     "startup_idea": "startup-idea-generator-bot",
-}
+})
+
+# Reverse index for bot -> task type lookups, precomputed once instead of scanning
+# AGENT_MAPPING at call sites. Read-only like the forward mapping.
+TASK_TYPE_BY_AGENT = MappingProxyType({bot: task_type for task_type, bot in AGENT_MAPPING.items()})
 
 # Mapping agent bots to their primary repository and workflow file for health checks
 AGENT_WORKFLOW_INFO = {
@@ -57,44 +103,117 @@ AGENT_WORKFLOW_INFO = {
 }
 
 
+# Explicit public surface: importers get exactly one controller class and the
+# routing tables, so a stray redefinition can never shadow the real one.
+__all__ = ["GitHubAgentController", "AGENT_MAPPING", "TASK_TYPE_BY_AGENT", "AGENT_WORKFLOW_INFO"]
+
+# Workflow-state labels the controller manages on task issues
+TASK_STATE_LABELS = frozenset({"todo", "in-progress", "completed"})
+
+
+def _label_names(issue):
+    """Label names as a set, for O(1) membership tests instead of list scans."""
+    return {label["name"] for label in issue.get("labels", [])}
+
+
+_GITHUB_TS_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+
+
+def _parse_github_timestamp(ts):
+    """Parse GitHub's fixed 'Z'-suffixed UTC timestamps directly.
+
+    Avoids the str.replace copy plus fromisoformat format sniffing on the
+    health-check hot path; every API timestamp uses the same layout.
+    """
+    return datetime.strptime(ts, _GITHUB_TS_FORMAT).replace(tzinfo=timezone.utc)
+
+
+def _backoff_sleep(attempt, base=1.0, cap=60.0):
+    """Exponential backoff with full jitter so concurrent workers don't retry in lockstep."""
+    time.sleep(random.uniform(0, min(cap, base * (2 ** attempt))))
+
+
 class GitHubAgentController:
     def __init__(self, github_token):
         self.token = github_token
         self.headers = {
             "Authorization": f"token {github_token}",
             "Accept": "application/vnd.github.v3+json",
+            # Explicitly negotiate compressed payloads (brotli only when a
+            # decoder is installed) so large issue/run lists ship compressed.
+            "Accept-Encoding": ACCEPT_ENCODING,
             "X-GitHub-Api-Version": "2022-11-28"
         }
-        self.session = requests.Session()
-        self.session.headers.update(self.headers)
+        if httpx is not None:
+            # HTTP/2 multiplexes all concurrent workers over one TLS connection
+            self.session = httpx.Client(
+                http2=True,
+                headers=self.headers,
+                limits=httpx.Limits(max_keepalive_connections=MAX_ASSIGNMENT_WORKERS * 2),
+            )
+        else:
+            self.session = requests.Session()
+            self.session.headers.update(self.headers)
+            # Size the connection pool for the assignment worker pool so threads reuse
+            # keep-alive connections instead of opening (and handshaking) new ones.
+            adapter = requests.adapters.HTTPAdapter(
+                pool_connections=MAX_ASSIGNMENT_WORKERS,
+                pool_maxsize=MAX_ASSIGNMENT_WORKERS * 2,
+            )
+            self.session.mount("https://", adapter)
+            self.session.mount("http://", adapter)
+        self._etag_cache = {}  # (url, params) -> (etag, cached body); 304 replays are free rate-limit-wise
+        self._authenticated_user = None  # Memoized /user login; stable for a token's lifetime
         self.controller_bot_username = self._get_authenticated_user()
 
     def _get_authenticated_user(self):
+        if self._authenticated_user:
+            return self._authenticated_user
         try:
             response = self._github_api_request("GET", "/user")
-            return response.get("login", "agent-controller-bot") # Default if something fails
-        except requests.exceptions.RequestException as e:
+            login = response.get("login") # Default if something fails
+            if login:
+                self._authenticated_user = login  # Only cache a confirmed login
+                return login
+            return "agent-controller-bot"
+        except HTTP_REQUEST_ERRORS as e:
             print(f"Error getting authenticated user: {e}")
             return "agent-controller-bot"
 
+    def _is_self_assigned(self, issue):
+        """Cheap bot-self check against the memoized login; no extra /user calls."""
+        me = self._get_authenticated_user()
+        return any(a.get("login") == me for a in issue.get("assignees", []))
+
 
     def _github_api_request(self, method, endpoint, params=None, data=None, max_retries=3, base_url=GITHUB_API_URL):
         url = f"{base_url}{endpoint}"
+        cache_key = cached = request_headers = None
+        if method == "GET":
+            cache_key = (url, tuple(sorted(params.items())) if params else None)
+            cached = self._etag_cache.get(cache_key)
+            if cached:
+                request_headers = {"If-None-Match": cached[0]}
         for attempt in range(max_retries):
             try:
-                response = self.session.request(method, url, params=params, json=data)
+                response = self.session.request(method, url, params=params, json=data, headers=request_headers)
+                if response.status_code == 304 and cached:
+                    return cached[1]  # Unchanged since last poll; serve from cache
                 response.raise_for_status()  # Raise an exception for bad status codes
                 # Handle rate limiting
                 if 'X-RateLimit-Remaining' in response.headers and int(response.headers['X-RateLimit-Remaining']) < 10:
                     reset_time = int(response.headers.get('X-RateLimit-Reset', time.time() + 60))
-                    sleep_duration = max(0, reset_time - time.time()) + 5 # Add a small buffer
+                    sleep_duration = max(0, reset_time - time.time()) + random.uniform(1, 5) # Jittered buffer
                     print(f"Rate limit low. Sleeping for {sleep_duration} seconds.")
                     time.sleep(sleep_duration)
-                return response.json() if response.content else {}
-            except requests.exceptions.HTTPError as e:
+                body = _json_loads(response.content) if response.content else {}
+                if cache_key is not None and "ETag" in response.headers:
+                    self._etag_cache[cache_key] = (response.headers["ETag"], body)
+                return body
+            except HTTP_STATUS_ERRORS as e:
                 if e.response.status_code == 403 and "rate limit exceeded" in e.response.text.lower():
                     reset_time = int(e.response.headers.get('X-RateLimit-Reset', time.time() + 60* (attempt + 1)))
-                    sleep_duration = max(0, reset_time - time.time()) + 5 # Add buffer
+                    sleep_duration = max(0, reset_time - time.time()) + random.uniform(1, 5) # Jittered buffer
                     print(f"Rate limit exceeded. Retrying in {sleep_duration} seconds (attempt {attempt+1}/{max_retries})...")
                     time.sleep(sleep_duration)
                     continue
@@ -103,37 +222,78 @@ class GitHubAgentController:
                 print(f"GitHub API request failed ({e.response.status_code}): {e.response.text}")
                 if attempt == max_retries - 1:
                     raise
-            except requests.exceptions.RequestException as e:
+            except HTTP_REQUEST_ERRORS as e:
                 print(f"GitHub API request failed: {e}")
                 if attempt == max_retries - 1:
                     raise
-            time.sleep(2 ** attempt) # Exponential backoff for other errors
+            _backoff_sleep(attempt) # Jittered exponential backoff for other errors
         return {} # Should not be reached if raise is working
 
+    def _graphql(self, query, variables=None):
+        # Single round trip for queries that would otherwise need several REST calls
+        payload = {"query": query}
+        if variables:
+            payload["variables"] = variables
+        response = self._github_api_request("POST", "/graphql", data=payload)
+        if response and "errors" in response:
+            print(f"GraphQL query returned errors: {response['errors']}")
+        return (response or {}).get("data", {})
+
+    def _paginate(self, endpoint, params=None, per_page=100):
+        """Lazily yield items from a list endpoint, one page per round trip.
+
+        Fetches pages of 100 (the API maximum) and stops as soon as a short
+        page arrives, so callers that break early never pay for later pages.
+        """
+        page_params = dict(params or {})
+        page_params["per_page"] = per_page
+        page = 1
+        while True:
+            page_params["page"] = page
+            items = self._github_api_request("GET", endpoint, params=page_params)
+            if not items:
+                return
+            yield from items
+            if len(items) < per_page:
+                return
+            page += 1
+
+    def _set_state_label(self, issue_number, current_labels, state_label):
+        # PUT replaces the full label set in one round trip (vs DELETE old +
+        # POST new), so rebuild the replacement from the issue's current
+        # labels: everything that isn't a workflow-state label survives the
+        # transition (priority tags, triage labels added by humans, ...).
+        labels = sorted((set(current_labels) - TASK_STATE_LABELS) | {state_label})
+        return self._github_api_request("PUT", f"/repos/{AGENT_TASKS_REPO}/issues/{issue_number}/labels", data={"labels": labels})
+
     def get_pending_tasks(self):
         print("🔍 Scanning for pending tasks...")
         endpoint = f"/repos/{AGENT_TASKS_REPO}/issues"
         params = {"labels": "todo", "state": "open", "assignee": "none", "sort": "created", "direction": "asc"}
         try:
-            issues = self._github_api_request("GET", endpoint, params=params)
             pending_tasks = []
-            if issues: # API returns a list of issues
-                for issue in issues:
-                    try:
-                        # Task details are expected in the issue body as JSON
-                        task_details_json = issue.get("body", "{}")
-                        if not task_details_json.strip(): # Handle empty body
-                            task_details_json = "{}"
-                        task_details = json.loads(task_details_json)
-                        if "type" in task_details and "id" in task_details: # Basic validation
-                            pending_tasks.append({"issue_number": issue["number"], "details": task_details, "title": issue["title"]})
-                        else:
-                            print(f"⚠️ Task issue #{issue['number']} body is not valid JSON with type/id: {issue.get('body', '')[:100]}...")
-                    except json.JSONDecodeError:
-                        print(f"⚠️ Could not parse JSON from issue #{issue['number']} body: {issue.get('body', '')[:100]}...")
+            # Lazily paginated: 100 issues per round trip, later pages only if needed
+            for issue in self._paginate(endpoint, params=params):
+                if self._is_self_assigned(issue):
+                    # The server-side assignee filter can serve a stale page
+                    # (ETag replay); never re-claim an issue we already hold.
+                    print(f"⏭️ Issue #{issue['number']} already assigned to this controller. Skipping.")
+                    continue
+                try:
+                    # Task details are expected in the issue body as JSON
+                    task_details_json = issue.get("body", "{}")
+                    if not task_details_json.strip(): # Handle empty body
+                        task_details_json = "{}"
+                    task_details = _json_loads(task_details_json)
+                    if "type" in task_details and "id" in task_details: # Basic validation
+                        pending_tasks.append({"issue_number": issue["number"], "details": task_details, "title": issue["title"], "label_names": _label_names(issue)})
+                    else:
+                        print(f"⚠️ Task issue #{issue['number']} body is not valid JSON with type/id: {issue.get('body', '')[:100]}...")
+                except json.JSONDecodeError:
+                    print(f"⚠️ Could not parse JSON from issue #{issue['number']} body: {issue.get('body', '')[:100]}...")
             print(f"Found {len(pending_tasks)} pending tasks.")
             return pending_tasks
-        except requests.exceptions.RequestException as e:
+        except HTTP_REQUEST_ERRORS as e:
             print(f"Error fetching pending tasks: {e}")
             return []
 
@@ -151,108 +311,102 @@ class GitHubAgentController:
 
         print(f"Assigning Task ID {task_id} (Issue #{issue_number}, Type: {task_type}) to agent '{agent_bot_username}'...")
         assign_endpoint = f"/repos/{AGENT_TASKS_REPO}/issues/{issue_number}/assignees"
-        label_endpoint = f"/repos/{AGENT_TASKS_REPO}/issues/{issue_number}/labels"
-        
+
         try:
             # Assign the issue
             self._github_api_request("POST", assign_endpoint, data={"assignees": [agent_bot_username]})
-            # Remove 'todo' label and add 'in-progress' label
-            self._github_api_request("DELETE", f"{label_endpoint}/todo") # Assumes 'todo' is a single label
-            self._github_api_request("POST", label_endpoint, data={"labels": ["in-progress"]})
+            # Swap 'todo' for 'in-progress' in a single call, keeping other labels
+            self._set_state_label(issue_number, task_issue.get("label_names", ()), "in-progress")
             print(f"✅ Task ID {task_id} (Issue #{issue_number}) assigned to {agent_bot_username} and labeled 'in-progress'.")
-        except requests.exceptions.RequestException as e:
+        except HTTP_REQUEST_ERRORS as e:
             print(f"Error assigning task {task_id} (Issue #{issue_number}): {e}")
 
 
     def monitor_completed_tasks(self):
         print("🔄 Monitoring for completed tasks...")
         endpoint = f"/repos/{AGENT_TASKS_REPO}/issues"
-        # Check issues that are in-progress or recently updated and closed
-        params = {"labels": "in-progress", "state": "all", "sort": "updated", "direction": "desc", "per_page": 50}
+        # Completion signal is the issue being closed while still labeled 'in-progress';
+        # agents close their task issue when done, so no per-issue comment fetches needed.
+        params = {"labels": "in-progress", "state": "closed", "sort": "updated", "direction": "desc", "per_page": 50}
         try:
             issues = self._github_api_request("GET", endpoint, params=params)
             if not issues: # API returns a list
-                print("No 'in-progress' tasks found to monitor.")
+                print("No completed 'in-progress' tasks found to process.")
                 return
 
             completed_count = 0
             for issue in issues:
                 issue_number = issue["number"]
-                is_in_progress = any(label["name"] == "in-progress" for label in issue.get("labels", []))
-
-                # Check for "DONE ✅" comment
-                comments_url = issue.get("comments_url")
-                task_marked_done_by_comment = False
-                if comments_url:
-                    comments = self._github_api_request("GET", "", base_url=comments_url) # Pass full URL
-                    if comments: # API returns a list
-                        for comment in reversed(comments): # Check recent comments first
-                            if "DONE ✅" in comment.get("body", ""):
-                                task_marked_done_by_comment = True
-                                break
-                
-                is_closed = issue.get("state") == "closed"
-
-                if (is_in_progress and (task_marked_done_by_comment or is_closed)):
-                    print(f"🏁 Task Issue #{issue_number} appears completed.")
-                    label_endpoint = f"/repos/{AGENT_TASKS_REPO}/issues/{issue_number}/labels"
-                    # Remove 'in-progress', add 'completed'
-                    self._github_api_request("DELETE", f"{label_endpoint}/in-progress", data={}) # Empty data for DELETE label
-                    self._github_api_request("POST", label_endpoint, data={"labels": ["completed"]})
-                    
-                    # If not already closed, close it
-                    if not is_closed:
-                        self._github_api_request("PATCH", f"/repos/{AGENT_TASKS_REPO}/issues/{issue_number}", data={"state": "closed"})
-                    
-                    print(f"Processed completion for Task Issue #{issue_number}.")
-                    completed_count +=1
+                print(f"🏁 Task Issue #{issue_number} appears completed.")
+                # One PUT swaps 'in-progress' for 'completed', keeping other labels
+                self._set_state_label(issue_number, _label_names(issue), "completed")
+                print(f"Processed completion for Task Issue #{issue_number}.")
+                completed_count += 1
             print(f"Processed {completed_count} completed tasks.")
 
-        except requests.exceptions.RequestException as e:
+        except HTTP_REQUEST_ERRORS as e:
             print(f"Error monitoring completed tasks: {e}")
 
 
+    def _check_agent_health(self, agent_bot, info):
+        """Check one agent's last successful run. Returns an unhealthy-report dict or None."""
+        repo_full_name = info["repo"]
+        workflow_file = info["workflow_file"]
+        schedule_minutes = info.get("schedule_minutes", 24*60) # Default to 1 day if not specified
+        max_delay_minutes = schedule_minutes * 2 # Allow 2x schedule interval
+
+        endpoint = f"/repos/{repo_full_name}/actions/workflows/{workflow_file}/runs"
+        params = {"status": "success", "per_page": 1} # Get the latest successful run
+
+        # Signals are checked cheapest-first; the first failed one reports immediately,
+        # skipping any remaining parsing/arithmetic for this agent.
+        try:
+            runs_response = self._github_api_request("GET", endpoint, params=params)
+            if not runs_response or not runs_response.get("workflow_runs"): # API returns an object with 'workflow_runs' list
+                print(f"⚠️ Agent {agent_bot} ({repo_full_name}) might be unhealthy. No successful runs found.")
+                return {
+                    "agent": agent_bot,
+                    "repo": repo_full_name,
+                    "reason": "No successful workflow runs found."
+                }
+
+            last_run_time_str = runs_response["workflow_runs"][0].get("updated_at") # or "created_at"
+            if not last_run_time_str:
+                print(f"⚠️ Agent {agent_bot} ({repo_full_name}) might be unhealthy. Last run has no timestamp.")
+                return {
+                    "agent": agent_bot,
+                    "repo": repo_full_name,
+                    "reason": "Latest successful run is missing its timestamp."
+                }
+
+            last_run_time = _parse_github_timestamp(last_run_time_str)
+            if datetime.now(timezone.utc) - last_run_time > timedelta(minutes=max_delay_minutes):
+                print(f"⚠️ Agent {agent_bot} ({repo_full_name}) might be unhealthy. Last success: {last_run_time_str}")
+                return {
+                    "agent": agent_bot,
+                    "repo": repo_full_name,
+                    "last_success": last_run_time_str,
+                    "reason": f"Last successful run was more than {max_delay_minutes} minutes ago."
+                }
+
+            print(f"✅ Agent {agent_bot} ({repo_full_name}) is healthy. Last success: {last_run_time_str}")
+            return None
+        except HTTP_REQUEST_ERRORS as e:
+            print(f"Error checking health for agent {agent_bot} ({repo_full_name}): {e}")
+            return {"agent": agent_bot, "repo": repo_full_name, "reason": f"API error during health check: {str(e)}"}
+
     def perform_agent_health_checks(self):
         print("🩺 Performing agent health checks...")
         unhealthy_agents = []
-        for agent_bot, info in AGENT_WORKFLOW_INFO.items():
-            repo_full_name = info["repo"]
-            workflow_file = info["workflow_file"]
-            schedule_minutes = info.get("schedule_minutes", 24*60) # Default to 1 day if not specified
-            max_delay_minutes = schedule_minutes * 2 # Allow 2x schedule interval
-
-            endpoint = f"/repos/{repo_full_name}/actions/workflows/{workflow_file}/runs"
-            params = {"status": "success", "per_page": 1} # Get the latest successful run
-            
-            try:
-                runs_response = self._github_api_request("GET", endpoint, params=params)
-                if runs_response and runs_response.get("workflow_runs"): # API returns an object with 'workflow_runs' list
-                    last_run = runs_response["workflow_runs"][0]
-                    last_run_time_str = last_run.get("updated_at") # or "created_at"
-                    last_run_time = datetime.fromisoformat(last_run_time_str.replace("Z", "+00:00"))
-                    
-                    if datetime.now(timezone.utc) - last_run_time > timedelta(minutes=max_delay_minutes):
-                        unhealthy_agents.append({
-                            "agent": agent_bot, 
-                            "repo": repo_full_name,
-                            "last_success": last_run_time_str,
-                            "reason": f"Last successful run was more than {max_delay_minutes} minutes ago."
-                        })
-                        print(f"⚠️ Agent {agent_bot} ({repo_full_name}) might be unhealthy. Last success: {last_run_time_str}")
-                    else:
-                        print(f"✅ Agent {agent_bot} ({repo_full_name}) is healthy. Last success: {last_run_time_str}")
-
-                else: # No successful runs found
-                    unhealthy_agents.append({
-                        "agent": agent_bot,
-                        "repo": repo_full_name,
-                        "reason": "No successful workflow runs found."
-                    })
-                    print(f"⚠️ Agent {agent_bot} ({repo_full_name}) might be unhealthy. No successful runs found.")
-            except requests.exceptions.RequestException as e:
-                print(f"Error checking health for agent {agent_bot} ({repo_full_name}): {e}")
-                unhealthy_agents.append({"agent": agent_bot, "repo": repo_full_name, "reason": f"API error during health check: {str(e)}"})
-        
+        # Each agent check is an independent API call, so run them concurrently
+        with ThreadPoolExecutor(max_workers=MAX_ASSIGNMENT_WORKERS) as executor:
+            futures = [executor.submit(self._check_agent_health, agent_bot, info)
+                       for agent_bot, info in AGENT_WORKFLOW_INFO.items()]
+            for future in as_completed(futures):
+                report = future.result()
+                if report:
+                    unhealthy_agents.append(report)
+
         if unhealthy_agents:
             self._create_health_alert_issue(unhealthy_agents)
         return unhealthy_agents
@@ -273,19 +427,28 @@ class GitHubAgentController:
             "assignee": self.controller_bot_username # Assign to self or a maintenance team
         }
         try:
-            # Check if a similar open alert already exists to avoid spamming
-            open_alerts = self._github_api_request("GET", f"/repos/{AGENT_CONTROLLER_REPO}/issues", params={"labels": "alert,health-check", "state": "open", "creator": self.controller_bot_username})
-            if open_alerts: # API returns a list
-                for alert in open_alerts: # A very basic check, could be more sophisticated
-                    if "Automated Health Alert" in alert.get("title", ""):
-                        print("An open health alert already exists. Skipping new issue creation.")
-                        # Optionally, update the existing issue
-                        self._github_api_request("POST", f"/repos/{AGENT_CONTROLLER_REPO}/issues/{alert['number']}/comments", data={"body": f"**Update {datetime.now(timezone.utc).isoformat()}:**\nHealth check still reporting issues. Details:\n{issue_body}"})
-                        return
+            # Search-first duplicate check: one GraphQL round trip returns the existing
+            # open alert (if any) instead of listing and scanning all open issues.
+            alert_search = self._graphql(f"""
+            query {{
+              alerts: search(
+                query: "repo:{AGENT_CONTROLLER_REPO} is:issue is:open label:alert label:health-check author:{self.controller_bot_username} \\"Automated Health Alert\\" in:title",
+                type: ISSUE, first: 1
+              ) {{
+                nodes {{ ... on Issue {{ number }} }}
+              }}
+            }}
+            """)
+            existing_alerts = alert_search.get("alerts", {}).get("nodes", [])
+            if existing_alerts:
+                alert_number = existing_alerts[0]["number"]
+                print("An open health alert already exists. Skipping new issue creation.")
+                self._github_api_request("POST", f"/repos/{AGENT_CONTROLLER_REPO}/issues/{alert_number}/comments", data={"body": f"**Update {datetime.now(timezone.utc).isoformat()}:**\nHealth check still reporting issues. Details:\n{issue_body}"})
+                return
 
             self._github_api_request("POST", f"/repos/{AGENT_CONTROLLER_REPO}/issues", data=data)
             print("✅ Health alert issue created.")
-        except requests.exceptions.RequestException as e:
+        except HTTP_REQUEST_ERRORS as e:
             print(f"Error creating health alert issue: {e}")
 
 
@@ -296,16 +459,19 @@ class GitHubAgentController:
         completed_today_count = 0
 
         try:
-            # Corrected logic: API returns a list of issues. We need len().
-            issues_todo = self._github_api_request("GET", f"/repos/{AGENT_TASKS_REPO}/issues", params={"labels": "todo", "state": "open"})
-            pending_count = len(issues_todo) if isinstance(issues_todo, list) else 0
-
-            issues_inprogress = self._github_api_request("GET", f"/repos/{AGENT_TASKS_REPO}/issues", params={"labels": "in-progress", "state": "open"})
-            inprogress_count = len(issues_inprogress) if isinstance(issues_inprogress, list) else 0
-            
-            since_date = (datetime.now(timezone.utc) - timedelta(days=1)).isoformat()
-            issues_completed = self._github_api_request("GET", f"/repos/{AGENT_TASKS_REPO}/issues", params={"labels": "completed", "state": "closed", "since": since_date})
-            completed_today_count = len(issues_completed) if isinstance(issues_completed, list) else 0
+            # One GraphQL round trip with aliased searches replaces the three REST list calls
+            since_date = (datetime.now(timezone.utc) - timedelta(days=1)).strftime("%Y-%m-%dT%H:%M:%S")
+            counts_query = f"""
+            query {{
+              pending: search(query: "repo:{AGENT_TASKS_REPO} is:issue label:todo state:open", type: ISSUE) {{ issueCount }}
+              inprogress: search(query: "repo:{AGENT_TASKS_REPO} is:issue label:in-progress state:open", type: ISSUE) {{ issueCount }}
+              completed: search(query: "repo:{AGENT_TASKS_REPO} is:issue label:completed state:closed updated:>={since_date}", type: ISSUE) {{ issueCount }}
+            }}
+            """
+            counts = self._graphql(counts_query)
+            pending_count = counts.get("pending", {}).get("issueCount", 0)
+            inprogress_count = counts.get("inprogress", {}).get("issueCount", 0)
+            completed_today_count = counts.get("completed", {}).get("issueCount", 0)
 
             metrics = {
                 "timestamp": datetime.now(timezone.utc).isoformat(),
@@ -316,49 +482,50 @@ class GitHubAgentController:
                 "pionex_balance_usdt": self.get_pionex_balance(),
             }
             
-            metrics_file_path = f"metrics/daily_metrics_{datetime.now(timezone.utc).strftime('%Y-%m-%d')}.json"
-            
+            # Daily metrics file is NDJSON: one snapshot per line. Appending only needs
+            # the decoded bytes plus one new line -- the file is never JSON-parsed or
+            # re-serialized as a whole, so the write cost stays flat as the day fills up.
+            metrics_file_path = f"metrics/daily_metrics_{datetime.now(timezone.utc).strftime('%Y-%m-%d')}.ndjson"
+
             try:
-                existing_content_res = self._github_api_request(
-                    "GET", f"/repos/{AGENT_RESULTS_REPO}/contents/{metrics_file_path}"
-                )
-                existing_metrics_data = []
+                # First run of the day the file doesn't exist yet; a 404 here
+                # (whether surfaced as None or raised by the HTTP stack) means
+                # create, not fail -- the PUT below just goes out without a sha.
+                try:
+                    existing_content_res = self._github_api_request(
+                        "GET", f"/repos/{AGENT_RESULTS_REPO}/contents/{metrics_file_path}"
+                    )
+                except HTTP_STATUS_ERRORS as e:
+                    if getattr(e, "response", None) is None or e.response.status_code != 404:
+                        raise
+                    existing_content_res = None
+                existing_bytes = b""
                 sha = None
-                if existing_content_res and 'content' in existing_content_res: 
-                    content = base64.b64decode(existing_content_res['content']).decode('utf-8')
-                    existing_metrics_data = json.loads(content)
+                if existing_content_res and 'content' in existing_content_res:
+                    existing_bytes = base64.b64decode(existing_content_res['content'])
                     sha = existing_content_res['sha']
-                
-                existing_metrics_data.append(metrics)
-                new_content_b64 = base64.b64encode(json.dumps(existing_metrics_data, indent=2).encode('utf-8')).decode('utf-8')
-                
-                commit_message = f"Update system metrics {datetime.now(timezone.utc).isoformat()}"
+                else:
+                    print(f"Creating new daily metrics file {metrics_file_path}.")
+
+                new_line = json.dumps(metrics, separators=(",", ":")).encode('utf-8') + b"\n"
+                new_content_b64 = base64.b64encode(existing_bytes + new_line).decode('utf-8')
+
+                commit_message = f"Update system metrics {metrics['timestamp']}"
                 commit_data = {
                     "message": commit_message,
                     "content": new_content_b64,
-                    "branch": "main" 
+                    "branch": "main"
                 }
-                if sha: 
+                if sha:
                     commit_data["sha"] = sha
 
                 self._github_api_request("PUT", f"/repos/{AGENT_RESULTS_REPO}/contents/{metrics_file_path}", data=commit_data)
                 print(f"✅ System metrics updated in {AGENT_RESULTS_REPO}/{metrics_file_path}")
 
-            except Exception as e: 
-                if "404" in str(e) or (existing_content_res and existing_content_res.get("type") != "file"): # File not found or not a file, create new
-                    new_content_b64 = base64.b64encode(json.dumps([metrics], indent=2).encode('utf-8')).decode('utf-8')
-                    commit_message = f"Create system metrics {datetime.now(timezone.utc).isoformat()}"
-                    commit_data = {
-                        "message": commit_message,
-                        "content": new_content_b64,
-                        "branch": "main"
-                    }
-                    self._github_api_request("PUT", f"/repos/{AGENT_RESULTS_REPO}/contents/{metrics_file_path}", data=commit_data)
-                    print(f"✅ System metrics created in {AGENT_RESULTS_REPO}/{metrics_file_path}")
-                else:
-                    print(f"Error updating/creating metrics file: {e}")
+            except Exception as e:
+                print(f"Error updating/creating metrics file: {e}")
 
-        except requests.exceptions.RequestException as e:
+        except HTTP_REQUEST_ERRORS as e:
             print(f"Error updating system metrics: {e}")
 
     def get_pionex_balance(self):
@@ -369,14 +536,56 @@ class GitHubAgentController:
         # return pionex_api.get_balance("USDT") 
         return 1000.00 # Dummy value
 
+    def handle_issue_event(self, event):
+        """Event-driven fast path for webhook-triggered runs.
+
+        When the controller workflow fires on an `issues` event instead of the
+        cron schedule, only the issue in the event payload needs processing --
+        no repo-wide polling sweep, no health checks, no metrics write.
+        """
+        action = event.get("action")
+        issue = event.get("issue")
+        if not issue:
+            print(f"⚠️ Issue event with action '{action}' has no issue payload. Ignoring.")
+            return
+
+        issue_number = issue["number"]
+        labels = _label_names(issue) & TASK_STATE_LABELS
+        print(f"⚡ Handling issue event: #{issue_number} action={action}")
+
+        if action in ("opened", "reopened", "labeled") and "todo" in labels:
+            if self._is_self_assigned(issue) or issue.get("assignees"):
+                print(f"⏭️ Issue #{issue_number} is already assigned. Skipping claim.")
+                return
+            try:
+                task_details = _json_loads(issue.get("body") or "{}")
+            except json.JSONDecodeError:
+                print(f"⚠️ Could not parse JSON from issue #{issue_number} body: {(issue.get('body') or '')[:100]}...")
+                return
+            if "type" in task_details and "id" in task_details:
+                self.assign_task_to_agent({"issue_number": issue_number, "details": task_details, "title": issue["title"], "label_names": _label_names(issue)})
+            else:
+                print(f"⚠️ Task issue #{issue_number} body is not valid JSON with type/id. Ignoring.")
+        elif action == "closed" and "in-progress" in labels:
+            print(f"🏁 Task Issue #{issue_number} closed by its agent.")
+            self._set_state_label(issue_number, _label_names(issue), "completed")
+        else:
+            print(f"No action needed for issue #{issue_number} ({action}).")
+
     def run_coordination_cycle(self):
         print(f"🎯 Agent coordination cycle started at {datetime.now(timezone.utc).isoformat()} by {self.controller_bot_username}")
         
-        # 1. Scan for and assign new tasks
+        # 1. Scan for and assign new tasks (network-bound, so fan out across a bounded worker pool)
         pending_tasks = self.get_pending_tasks()
-        for task in pending_tasks:
-            self.assign_task_to_agent(task)
-            time.sleep(1) 
+        if pending_tasks:
+            with ThreadPoolExecutor(max_workers=MAX_ASSIGNMENT_WORKERS) as executor:
+                future_to_task = {executor.submit(self.assign_task_to_agent, task): task for task in pending_tasks}
+                for future in as_completed(future_to_task):
+                    task = future_to_task[future]
+                    try:
+                        future.result()
+                    except Exception as e:
+                        print(f"Error assigning task (Issue #{task['issue_number']}): {e}")
 
         # 2. Monitor completed tasks
         self.monitor_completed_tasks()
@@ -396,4 +605,13 @@ if __name__ == "__main__":
         raise ValueError("GITHUB_TOKEN environment variable not set.")
     
     controller = GitHubAgentController(github_token)
-    controller.run_coordination_cycle()
+
+    # Prefer the event-driven path when triggered by an issues webhook (GitHub
+    # Actions exposes the payload via GITHUB_EVENT_PATH); fall back to the full
+    # polling sweep for scheduled/manual runs.
+    event_path = os.getenv("GITHUB_EVENT_PATH")
+    if os.getenv("GITHUB_EVENT_NAME") == "issues" and event_path and os.path.exists(event_path):
+        with open(event_path, "rb") as f:
+            controller.handle_issue_event(_json_loads(f.read()))
+    else:
+        controller.run_coordination_cycle()